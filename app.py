@@ -8,12 +8,15 @@ import os
 import uuid
 import json
 import hashlib
+import threading
 from datetime import datetime, timedelta
-from flask import Flask, request, jsonify, send_file, render_template, redirect, url_for, session
+from flask import Flask, request, jsonify, send_file, render_template, redirect, url_for, session, Response
 from flask_cors import CORS
 import qrcode
+import qr_encoder
 from werkzeug.utils import secure_filename
 import re
+import string
 
 app = Flask(__name__)
 app.secret_key = 'your-secret-key-change-this-in-production'
@@ -94,7 +97,8 @@ def update_html_templates_config():
             os.path.join('templates', 'admin.html'),
             os.path.join('templates', 'admin_login.html'),
             os.path.join('templates', 'view.html'),
-            os.path.join('templates', 'pdf_viewer.html')
+            os.path.join('templates', 'pdf_viewer.html'),
+            os.path.join('templates', 'offline.html')
         ]
         
         for html_file in html_files:
@@ -145,6 +149,46 @@ if not os.path.exists(DROPDOWN_CONFIG_FILE):
     with open(DROPDOWN_CONFIG_FILE, 'w', encoding='utf-8') as f:
         json.dump(default_config, f, ensure_ascii=False, indent=2)
 
+# 记录变更日志（用于管理员面板增量同步）
+CHANGE_LOG_FILE = os.path.join(LOG_FOLDER, 'record_changes.json')
+CHANGE_LOG_LIMIT = 1000  # 最多保留的变更条数，更早的客户端需要全量重新加载
+SSE_HEARTBEAT_SECONDS = 15  # SSE心跳间隔（秒）
+change_log_condition = threading.Condition()
+# 变更日志的内存副本，只在文件被其他进程修改（修改时间或大小变化）时重新解析
+change_log_cache = {'file_state': None, 'change_log': {'version': 0, 'changes': []}}
+# 已登出的管理员会话令牌 -> 会话过期时间；会话保存在客户端Cookie中，
+# 已打开的SSE连接看不到其他标签页的登出，需要在服务器端记录
+revoked_admin_sessions = {}
+
+# 离线二维码（紧凑载荷）配置
+# 载荷格式：TB1.{下拉配置指纹}.{材质序号}.{反射体序号}.{区域序号}.{短ID}.{试块编号}
+# 二维码内容为 {BASE_URL}/offline#{载荷}：手机扫码直接打开离线查看页面，#后的载荷不会发送到服务器
+COMPACT_PAYLOAD_PREFIX = 'TB1'
+SHORT_ID_LENGTH = 6  # 短链接ID长度（取记录UUID前缀）
+QR_ALPHANUMERIC_CHARS = set(string.digits + string.ascii_uppercase + ' $%*+-./:')
+
+# 操作日志按天分文件保存（logs/admin_operations/YYYY-MM-DD.json），历史日期的文件不再改写，
+# 增量备份只需重新归档当天的文件；旧版本的 logs/admin_operations.json 仍会被读取
+ADMIN_LOG_FOLDER = os.path.join(LOG_FOLDER, 'admin_operations')
+LEGACY_ADMIN_LOG_FILE = os.path.join(LOG_FOLDER, 'admin_operations.json')
+# 操作日志写入锁，避免并发请求的读-改-写互相覆盖
+admin_log_lock = threading.Lock()
+
+def temp_file_path(file_path):
+    """同目录下的临时文件路径：.{文件名}.{32位十六进制}.tmp
+    
+    以点开头并带唯一后缀，不会与上传文件等正常文件重名；backup.py 只跳过这一格式的文件
+    """
+    directory, filename = os.path.split(file_path)
+    return os.path.join(directory, f".{filename}.{uuid.uuid4().hex}.tmp")
+
+def write_json_atomic(file_path, data, **dump_kwargs):
+    """原子写入JSON文件：先写临时文件再替换，并发读取（如在线备份）不会读到写了一半的文件"""
+    temp_file = temp_file_path(file_path)
+    with open(temp_file, 'w', encoding='utf-8') as f:
+        json.dump(data, f, **dump_kwargs)
+    os.replace(temp_file, file_path)
+
 def allowed_file(filename):
     """检查文件扩展名是否允许"""
     # 如果ALLOWED_EXTENSIONS为空，则允许所有文件类型
@@ -235,15 +279,179 @@ def log_admin_operation(operation_type, ip_address, before_state, after_state):
         'after_state': after_state
     }
     
-    log_file = os.path.join(LOG_FOLDER, 'admin_operations.json')
-    logs = []
-    if os.path.exists(log_file):
-        with open(log_file, 'r', encoding='utf-8') as f:
-            logs = json.load(f)
+    log_file = os.path.join(ADMIN_LOG_FOLDER, f"{datetime.now().strftime('%Y-%m-%d')}.json")
+    with admin_log_lock:
+        os.makedirs(ADMIN_LOG_FOLDER, exist_ok=True)
+        logs = []
+        if os.path.exists(log_file):
+            with open(log_file, 'r', encoding='utf-8') as f:
+                logs = json.load(f)
+        
+        logs.append(log_entry)
+        write_json_atomic(log_file, logs, ensure_ascii=False, indent=2)
+
+def load_change_log():
+    """读取记录变更日志，文件未变化时直接返回内存中的副本（调用方不得修改返回值）"""
+    try:
+        stat = os.stat(CHANGE_LOG_FILE)
+    except FileNotFoundError:
+        return {'version': 0, 'changes': []}
+    
+    file_state = (stat.st_mtime_ns, stat.st_size)
+    if file_state == change_log_cache['file_state']:
+        return change_log_cache['change_log']
+    
+    try:
+        with open(CHANGE_LOG_FILE, 'r', encoding='utf-8') as f:
+            change_log = json.load(f)
+        change_log = {
+            'version': change_log.get('version', 0),
+            'changes': change_log.get('changes', [])
+        }
+    except Exception as e:
+        print(f'读取变更日志失败: {e}')
+        return {'version': 0, 'changes': []}
+    
+    change_log_cache['change_log'] = change_log
+    change_log_cache['file_state'] = file_state
+    return change_log
+
+def record_change(action, record_id, record):
+    """追加一条记录变更（create/update/delete），返回新的版本号"""
+    with change_log_condition:
+        old_log = load_change_log()
+        version = old_log['version'] + 1
+        # 构建新对象而不是原地修改，未加锁的读取方仍能安全使用旧副本
+        changes = old_log['changes'] + [{
+            'version': version,
+            'action': action,
+            'record_id': record_id,
+            'record': record,
+            'timestamp': datetime.now().isoformat()
+        }]
+        # 只保留最近的变更
+        change_log = {'version': version, 'changes': changes[-CHANGE_LOG_LIMIT:]}
+        write_json_atomic(CHANGE_LOG_FILE, change_log, ensure_ascii=False, indent=2)
+        stat = os.stat(CHANGE_LOG_FILE)
+        change_log_cache['change_log'] = change_log
+        change_log_cache['file_state'] = (stat.st_mtime_ns, stat.st_size)
+        change_log_condition.notify_all()
+    return version
+
+def get_changes_since(since):
+    """获取指定版本之后的变更
+    
+    返回 (当前版本号, 变更列表)；如果since早于保留的最早变更或晚于当前版本，
+    变更列表为None，表示客户端需要全量重新加载
+    """
+    change_log = load_change_log()
+    version = change_log['version']
+    changes = change_log['changes']
+    if since > version:
+        return version, None
+    oldest_version = changes[0]['version'] if changes else version + 1
+    if since < oldest_version - 1:
+        return version, None
+    # 版本号连续递增，可直接按下标切片
+    return version, changes[since - oldest_version + 1:]
+
+def to_base36(number):
+    """将非负整数转换为大写36进制字符串"""
+    digits = string.digits + string.ascii_uppercase
+    result = ''
+    while True:
+        number, remainder = divmod(number, 36)
+        result = digits[remainder] + result
+        if number == 0:
+            return result
+
+def dropdown_fingerprint(dropdown_config):
+    """计算下拉列表配置的两位指纹，离线解码时用于检查配置是否一致
+    
+    对 JSON.stringify([materials, reflector_types, storage_areas]) 的UTF-8字节做FNV-1a哈希，
+    离线查看页面使用相同算法
+    """
+    lists = [dropdown_config.get(key, []) for key in ['materials', 'reflector_types', 'storage_areas']]
+    data = json.dumps(lists, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    value = 0x811c9dc5
+    for byte in data:
+        value = ((value ^ byte) * 0x01000193) & 0xffffffff
+    return to_base36(value % 1296).rjust(2, '0')
+
+def build_compact_payload(record_id, specimen_number, material, reflector_type, storage_area, dropdown_config):
+    """构建离线二维码载荷，字段不在下拉列表中时返回None"""
+    indices = []
+    for key, value in [('materials', material), ('reflector_types', reflector_type), ('storage_areas', storage_area)]:
+        options = dropdown_config.get(key, [])
+        if value not in options:
+            return None
+        indices.append(to_base36(options.index(value)))
+    
+    short_id = record_id[:SHORT_ID_LENGTH].upper()
+    return '.'.join([COMPACT_PAYLOAD_PREFIX, dropdown_fingerprint(dropdown_config), *indices, short_id, specimen_number])
+
+def compact_payload_segments(payload):
+    """生成离线二维码内容 {BASE_URL}/offline#{载荷}，选择版本最小的分段编码方式
+    
+    返回 (版本, QRData分段列表)，可直接交给 qr_encoder.encode_prepared，无需再次计算版本
+    
+    内容分为三段：链接前缀（字节模式）、载荷前缀（字母数字模式）、试块编号（字母数字或字节模式），
+    尝试相邻段的各种合并方式（合并后取能容纳全部字符的模式），取版本最小的一种
+    """
+    prefix, specimen_number = payload.rsplit('.', 1)
+    pieces = [
+        (f"{BASE_URL}/offline#", qrcode.util.MODE_8BIT_BYTE),
+        (prefix + '.', qrcode.util.MODE_ALPHA_NUM),
+        (specimen_number, qrcode.util.MODE_ALPHA_NUM if set(specimen_number) <= QR_ALPHANUMERIC_CHARS else qrcode.util.MODE_8BIT_BYTE)
+    ]
+    
+    candidates = []
+    # 相邻两段之间是否断开，共4种合并方式
+    for breaks in [(True, True), (True, False), (False, True), (False, False)]:
+        segments = [list(pieces[0])]
+        for piece, new_segment in zip(pieces[1:], breaks):
+            if new_segment:
+                segments.append(list(piece))
+            else:
+                segments[-1][0] += piece[0]
+                segments[-1][1] = max(segments[-1][1], piece[1])
+        candidates.append(qr_encoder.prepare_data([qrcode.util.QRData(text, mode=mode) for text, mode in segments],
+                                                  qrcode.constants.ERROR_CORRECT_L))
+    return min(candidates, key=lambda prepared: prepared[0])
+
+def save_record_qrcode(record, qr_mode):
+    """生成并保存记录的二维码图片，返回实际使用的模式（'compact' 或 'url'）"""
+    prepared = None
+    if qr_mode == 'compact':
+        # 离线模式：直接编码试块信息，扫码无需访问服务器
+        with open(DROPDOWN_CONFIG_FILE, 'r', encoding='utf-8') as f:
+            dropdown_config = json.load(f)
+        payload = build_compact_payload(record['id'], record['specimen_number'], record['material'],
+                                        record['reflector_type'], record['storage_area'], dropdown_config)
+        if payload:
+            prepared = compact_payload_segments(payload)
+    
+    if prepared is None:
+        # 链接模式；离线模式下自定义输入的字段无法用序号表示时也退回链接模式
+        qr_mode = 'url'
+        prepared = qr_encoder.prepare_data(f"{BASE_URL}/view/{record['id']}", qrcode.constants.ERROR_CORRECT_L)
     
-    logs.append(log_entry)
-    with open(log_file, 'w', encoding='utf-8') as f:
-        json.dump(logs, f, ensure_ascii=False, indent=2)
+    # 使用预计算表的编码器，输出与 qrcode 库逐位一致
+    qr_matrix = qr_encoder.encode_prepared([prepared], qrcode.constants.ERROR_CORRECT_L)[0]
+    qr_image = qr_encoder.make_image(qr_matrix, box_size=10, border=4)
+    qr_path = os.path.join(QRCODE_FOLDER, f"{record['id']}.png")
+    temp_path = temp_file_path(qr_path)
+    qr_image.save(temp_path, format='PNG')
+    os.replace(temp_path, qr_path)
+    return qr_mode
+
+def find_record_by_short_id(short_id):
+    """根据短ID查找记录ID，找不到或不唯一时返回None"""
+    prefix = short_id.lower()
+    if len(prefix) != SHORT_ID_LENGTH or not re.match(r'^[0-9a-f]+$', prefix):
+        return None
+    matches = [f[:-len('.json')] for f in os.listdir(DATA_FOLDER) if f.startswith(prefix) and f.endswith('.json')]
+    return matches[0] if len(matches) == 1 else None
 
 @app.route('/')
 def index():
@@ -280,6 +488,7 @@ def admin_login_post():
         session.permanent = True
         session['admin_logged_in'] = True
         session['login_time'] = datetime.now().isoformat()
+        session['session_token'] = uuid.uuid4().hex
         return jsonify({'success': True})
     else:
         return jsonify({'success': False, 'message': '密码错误'})
@@ -287,12 +496,14 @@ def admin_login_post():
 @app.route('/admin/logout')
 def admin_logout():
     """管理员登出"""
+    revoke_admin_session()
     session.pop('admin_logged_in', None)
     return redirect(url_for('index'))
 
 @app.route('/admin/logout', methods=['POST'])
 def admin_logout_api():
     """管理员登出API"""
+    revoke_admin_session()
     session.clear()
     return jsonify({'success': True, 'message': '已成功登出'})
 
@@ -330,6 +541,7 @@ def generate_qrcode():
         material = request.form.get('material', '').strip()
         reflector_type = request.form.get('reflector_type', '').strip()
         storage_area = request.form.get('storage_area', '').strip()
+        qr_mode = request.form.get('qr_mode', 'url').strip()
         
         # 验证必填字段
         if not all([specimen_number, material, reflector_type, storage_area]):
@@ -365,11 +577,16 @@ def generate_qrcode():
                     # 如果文件没有扩展名，直接使用UUID作为文件名
                     new_filename = str(uuid.uuid4())
                 file_path = os.path.join(UPLOAD_FOLDER, new_filename)
-                file.save(file_path)
+                # 先保存为临时文件再重命名，避免备份读到未写完的文件
+                temp_path = temp_file_path(file_path)
+                file.save(temp_path)
+                os.replace(temp_path, file_path)
                 certificate_file = new_filename
         
-        # 生成唯一ID
+        # 生成唯一ID，保证短链接ID（UUID前缀）不与已有记录冲突
         record_id = str(uuid.uuid4())
+        while any(f.startswith(record_id[:SHORT_ID_LENGTH]) for f in os.listdir(DATA_FOLDER)):
+            record_id = str(uuid.uuid4())
         
         # 保存记录
         record_data = {
@@ -382,29 +599,20 @@ def generate_qrcode():
             'created_at': datetime.now().isoformat()
         }
         
-        record_file = os.path.join(DATA_FOLDER, f"{record_id}.json")
-        with open(record_file, 'w', encoding='utf-8') as f:
-            json.dump(record_data, f, ensure_ascii=False, indent=2)
-        
-        # 生成二维码
-        qr_url = f"{BASE_URL}/view/{record_id}"
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_L,
-            box_size=10,
-            border=4,
-        )
-        qr.add_data(qr_url)
-        qr.make(fit=True)
+        # 生成二维码；分别记录请求的模式和实际使用的模式，编辑记录时按请求的模式重新生成
+        record_data['qr_mode_requested'] = 'compact' if qr_mode == 'compact' else 'url'
+        qr_mode = save_record_qrcode(record_data, record_data['qr_mode_requested'])
+        record_data['qr_mode'] = qr_mode
         
-        qr_image = qr.make_image(fill_color="black", back_color="white")
-        qr_filename = f"{record_id}.png"
-        qr_path = os.path.join(QRCODE_FOLDER, qr_filename)
-        qr_image.save(qr_path)
+        record_file = os.path.join(DATA_FOLDER, f"{record_id}.json")
+        write_json_atomic(record_file, record_data, ensure_ascii=False, indent=2)
+        record_change('create', record_id, record_data)
         
         return jsonify({
             'success': True,
             'record_id': record_id,
+            'qr_mode': qr_mode,
+            'short_url': f"{BASE_URL}/s/{record_id[:SHORT_ID_LENGTH].upper()}",
             'qr_image_url': f"{BASE_URL}/api/qrcode/{record_id}"
         })
         
@@ -431,6 +639,26 @@ def view_record(record_id):
     
     return render_template('view.html', record=record_data)
 
+@app.route('/s/<short_id>')
+def short_link(short_id):
+    """短链接，跳转到记录详情页面（离线二维码的在线回退）"""
+    record_id = find_record_by_short_id(short_id)
+    if not record_id:
+        return "记录不存在", 404
+    return redirect(url_for('view_record', record_id=record_id))
+
+@app.route('/offline')
+def offline_viewer():
+    """离线二维码解码查看页面"""
+    return render_template('offline.html')
+
+@app.route('/offline-sw.js')
+def offline_service_worker():
+    """离线查看页面的Service Worker，缓存页面以便无网络时使用"""
+    response = send_file(os.path.join('templates', 'offline-sw.js'), mimetype='application/javascript')
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
 @app.route('/pdf-viewer')
 def pdf_viewer():
     """PDF在线预览页面"""
@@ -457,8 +685,24 @@ def check_admin_session():
         session.clear()
         return False
     
+    if session.get('session_token') in revoked_admin_sessions:
+        session.clear()
+        return False
+    
     return True
 
+def revoke_admin_session():
+    """登出时在服务器端作废当前会话，并唤醒SSE连接使其立即检查"""
+    token = session.get('session_token')
+    with change_log_condition:
+        if token and 'login_time' in session:
+            now = datetime.now()
+            # 清理已自然过期的令牌
+            for expired_token in [t for t, expires in revoked_admin_sessions.items() if expires < now]:
+                del revoked_admin_sessions[expired_token]
+            revoked_admin_sessions[token] = datetime.fromisoformat(session['login_time']) + timedelta(hours=1)
+        change_log_condition.notify_all()
+
 # 管理员API接口
 @app.route('/api/admin/records')
 def get_all_records():
@@ -466,6 +710,8 @@ def get_all_records():
     if not check_admin_session():
         return jsonify({'success': False, 'message': '未授权访问'}), 401
     
+    # 先读取版本号再读取记录，之后的增量变更重复应用也是幂等的
+    version = load_change_log()['version']
     records = []
     data_files = [f for f in os.listdir(DATA_FOLDER) if f.endswith('.json') and f not in ['admin.json', 'dropdown_config.json', 'app_config.json']]
     
@@ -479,7 +725,66 @@ def get_all_records():
     
     # 按创建时间排序
     records.sort(key=lambda x: x.get('created_at', ''), reverse=True)
-    return jsonify({'success': True, 'records': records})
+    return jsonify({'success': True, 'records': records, 'version': version})
+
+@app.route('/api/admin/changes')
+def get_record_changes():
+    """获取指定版本之后的记录变更（管理员功能）"""
+    if not check_admin_session():
+        return jsonify({'success': False, 'message': '未授权访问'}), 401
+    
+    since = request.args.get('since', 0, type=int)
+    version, changes = get_changes_since(since)
+    if changes is None:
+        # 变更已被清理，客户端需要重新加载全部记录
+        return jsonify({'success': True, 'reset': True, 'version': version, 'changes': []})
+    return jsonify({'success': True, 'reset': False, 'version': version, 'changes': changes})
+
+@app.route('/api/admin/changes/version')
+def get_change_version():
+    """获取当前变更版本号，也用作轻量的会话检查（管理员功能）"""
+    if not check_admin_session():
+        return jsonify({'success': False, 'message': '未授权访问'}), 401
+    
+    return jsonify({'success': True, 'version': load_change_log()['version']})
+
+@app.route('/api/admin/changes/stream')
+def stream_record_changes():
+    """通过SSE实时推送记录变更（管理员功能）"""
+    if not check_admin_session():
+        return jsonify({'success': False, 'message': '未授权访问'}), 401
+    
+    # 断线重连时浏览器会带上Last-Event-ID
+    last_event_id = request.headers.get('Last-Event-ID', '')
+    since = int(last_event_id) if last_event_id.isdigit() else request.args.get('since', 0, type=int)
+    session_expires = datetime.fromisoformat(session['login_time']) + timedelta(hours=1)
+    session_token = session.get('session_token')
+    
+    def generate():
+        last_version = since
+        # 每次心跳都检查会话是否过期或已登出，登出后连接及时结束，客户端重连时收到401
+        while datetime.now() < session_expires and session_token not in revoked_admin_sessions:
+            with change_log_condition:
+                # 在锁内检查后再等待，避免漏掉检查与等待之间的通知
+                version, changes = get_changes_since(last_version)
+                if changes == [] and change_log_condition.wait(timeout=SSE_HEARTBEAT_SECONDS):
+                    continue
+            if changes is None:
+                # 变更已被清理，通知客户端重新加载全部记录
+                yield f"id: {version}\nevent: reset\ndata: {json.dumps({'version': version})}\n\n"
+                last_version = version
+            elif changes:
+                for change in changes:
+                    yield f"id: {change['version']}\ndata: {json.dumps(change, ensure_ascii=False)}\n\n"
+                last_version = version
+            else:
+                # 心跳；同时让其他进程写入的变更在下一轮被读取到
+                yield ': keepalive\n\n'
+    
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
 
 @app.route('/api/admin/record/<record_id>', methods=['PUT'])
 def update_record(record_id):
@@ -530,9 +835,14 @@ def update_record(record_id):
             'updated_at': datetime.now().isoformat()
         })
         
+        # 离线二维码中编码了记录内容，需要按新内容重新生成；链接二维码由服务器渲染最新数据，无需处理
+        # 按请求的模式判断：曾因自定义输入退回链接模式的记录，改回下拉列表选项后恢复为离线二维码
+        if old_record.get('qr_mode_requested', old_record.get('qr_mode')) == 'compact':
+            old_record['qr_mode'] = save_record_qrcode(old_record, 'compact')
+        
         # 保存更新后的记录
-        with open(record_file, 'w', encoding='utf-8') as f:
-            json.dump(old_record, f, ensure_ascii=False, indent=2)
+        write_json_atomic(record_file, old_record, ensure_ascii=False, indent=2)
+        record_change('update', record_id, old_record)
         
         # 记录操作日志
         log_admin_operation(
@@ -576,6 +886,7 @@ def delete_record(record_id):
         # 删除二维码文件
         if os.path.exists(qr_file):
             os.remove(qr_file)
+        record_change('delete', record_id, None)
         
         # 记录操作日志
         log_admin_operation(
@@ -631,8 +942,7 @@ def update_config():
                 return jsonify({'success': False, 'message': f'{key} 至少需要一个有效选项'})
         
         # 保存新配置
-        with open(DROPDOWN_CONFIG_FILE, 'w', encoding='utf-8') as f:
-            json.dump(cleaned_config, f, ensure_ascii=False, indent=2)
+        write_json_atomic(DROPDOWN_CONFIG_FILE, cleaned_config, ensure_ascii=False, indent=2)
         
         # 记录操作日志
         log_admin_operation(
@@ -685,8 +995,7 @@ def change_password():
         new_hash = hashlib.md5(new_password.encode()).hexdigest()
         admin_data['password'] = new_hash
         
-        with open(ADMIN_PASSWORD_FILE, 'w', encoding='utf-8') as f:
-            json.dump(admin_data, f)
+        write_json_atomic(ADMIN_PASSWORD_FILE, admin_data)
         
         # 记录操作日志
         log_admin_operation(
@@ -707,13 +1016,17 @@ def get_admin_logs():
     if not check_admin_session():
         return jsonify({'success': False, 'message': '未授权访问'}), 401
     
-    log_file = os.path.join(LOG_FOLDER, 'admin_operations.json')
-    if not os.path.exists(log_file):
-        return jsonify({'success': True, 'logs': []})
+    log_files = [LEGACY_ADMIN_LOG_FILE]
+    if os.path.isdir(ADMIN_LOG_FOLDER):
+        log_files += [os.path.join(ADMIN_LOG_FOLDER, filename) for filename in os.listdir(ADMIN_LOG_FOLDER)
+                      if filename.endswith('.json')]
     
     try:
-        with open(log_file, 'r', encoding='utf-8') as f:
-            logs = json.load(f)
+        logs = []
+        for log_file in log_files:
+            if os.path.exists(log_file):
+                with open(log_file, 'r', encoding='utf-8') as f:
+                    logs.extend(json.load(f))
         
         # 按时间倒序排列
         logs.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
@@ -0,0 +1,331 @@
+# -*- coding: utf-8 -*-
+"""
+在线增量备份与恢复工具
+服务运行期间对 data/、uploads/、qrcodes/、logs/ 生成一致的快照，
+每次只归档自上次快照以来变化的文件，并支持校验后恢复
+
+用法:
+    python backup.py snapshot [--full]      # 生成快照（默认增量）
+    python backup.py list                   # 列出所有快照
+    python backup.py verify [快照ID]        # 校验快照所需的归档是否完整
+    python backup.py restore 快照ID 目标目录 # 校验并恢复快照到目标目录
+"""
+
+import os
+import io
+import re
+import sys
+import json
+import shutil
+import tarfile
+import hashlib
+import argparse
+import tempfile
+import zlib
+from datetime import datetime
+
+# 配置
+BACKUP_FOLDER = 'backups'
+BACKUP_SOURCES = ['data', 'uploads', 'qrcodes', 'logs']
+MAX_SCAN_PASSES = 3  # 快照期间文件仍在变化时的最大重扫次数
+HASH_CHUNK_SIZE = 1024 * 1024
+# uploads/ 中的文件以UUID命名，写入后不会原地修改
+# （qrcodes/ 中离线二维码会在更新记录时原地重新生成，不能只按大小判断）
+IMMUTABLE_FOLDERS = ['uploads']
+# 应用写入中的临时文件（app.temp_file_path）：.{文件名}.{32位十六进制}.tmp
+TEMP_FILE_PATTERN = re.compile(r'^\..+\.[0-9a-f]{32}\.tmp$')
+
+def sha256_file(file_obj):
+    """计算文件对象的SHA256"""
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: file_obj.read(HASH_CHUNK_SIZE), b''):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+def scan_sources(root):
+    """扫描备份目录，返回 {相对路径: (大小, 修改时间ns)}，忽略写入中的临时文件"""
+    files = {}
+    for folder in BACKUP_SOURCES:
+        folder_path = os.path.join(root, folder)
+        if not os.path.isdir(folder_path):
+            continue
+        for dir_path, _, filenames in os.walk(folder_path):
+            for filename in filenames:
+                if TEMP_FILE_PATTERN.match(filename):
+                    continue
+                file_path = os.path.join(dir_path, filename)
+                try:
+                    stat = os.stat(file_path)
+                except FileNotFoundError:
+                    continue
+                rel_path = os.path.relpath(file_path, root).replace(os.sep, '/')
+                files[rel_path] = (stat.st_size, stat.st_mtime_ns)
+    return files
+
+def record_timestamp(content):
+    """读取记录文件的 updated_at/created_at，非记录文件返回None"""
+    try:
+        record = json.loads(content.decode('utf-8'))
+    except ValueError:
+        return None
+    if not isinstance(record, dict) or 'id' not in record:
+        return None
+    return record.get('updated_at') or record.get('created_at')
+
+def list_snapshots(backup_folder):
+    """按时间顺序列出快照ID"""
+    if not os.path.isdir(backup_folder):
+        return []
+    return sorted(f[:-len('.json')] for f in os.listdir(backup_folder)
+                  if f.endswith('.json') and os.path.exists(os.path.join(backup_folder, f[:-len('.json')] + '.tar.gz')))
+
+def load_manifest(backup_folder, snapshot_id):
+    """读取快照清单"""
+    with open(os.path.join(backup_folder, f"{snapshot_id}.json"), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def unchanged_entry(rel_path, size, mtime_ns, previous_entry):
+    """判断文件是否可以直接沿用上次快照的条目，无需重新读取"""
+    if not previous_entry or previous_entry['size'] != size:
+        return False
+    if previous_entry['mtime_ns'] == mtime_ns:
+        return True
+    # UUID命名的上传文件不会原地修改，大小相同即视为未变化
+    return rel_path.split('/', 1)[0] in IMMUTABLE_FOLDERS
+
+def create_snapshot(root='.', backup_folder=BACKUP_FOLDER, full=False):
+    """生成快照，返回快照清单
+
+    增量快照只归档内容（SHA256）在上一快照中不存在的文件；清单始终列出全部文件，
+    每个条目记录内容所在的快照，恢复时沿快照链取回
+    """
+    os.makedirs(backup_folder, exist_ok=True)
+    snapshots = list_snapshots(backup_folder)
+    parent = None if full or not snapshots else load_manifest(backup_folder, snapshots[-1])
+    previous_files = parent['files'] if parent else {}
+    # 已归档的内容：SHA256 -> 所在快照
+    known_objects = {entry['sha256']: entry['snapshot'] for entry in previous_files.values()}
+
+    snapshot_id = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+    archive_path = os.path.join(backup_folder, f"{snapshot_id}.tar.gz")
+    temp_archive_path = f"{archive_path}.tmp"
+
+    files = {}
+    stored_objects = set()
+    stats = {'scanned': 0, 'hashed': 0, 'stored': 0, 'stored_bytes': 0, 'records_changed': 0}
+
+    with tarfile.open(temp_archive_path, 'w:gz') as tar:
+        def capture(rel_path, size, mtime_ns):
+            """记录一个文件；应用使用原子替换写入，打开的文件句柄始终对应一个完整版本"""
+            previous_entry = previous_files.get(rel_path)
+            if unchanged_entry(rel_path, size, mtime_ns, previous_entry):
+                files[rel_path] = dict(previous_entry, mtime_ns=mtime_ns)
+                return
+
+            try:
+                source = open(os.path.join(root, rel_path), 'rb')
+            except FileNotFoundError:
+                files.pop(rel_path, None)
+                return
+            with source, tempfile.SpooledTemporaryFile(max_size=16 * 1024 * 1024) as spool:
+                digest = hashlib.sha256()
+                for chunk in iter(lambda: source.read(HASH_CHUNK_SIZE), b''):
+                    digest.update(chunk)
+                    spool.write(chunk)
+                sha256 = digest.hexdigest()
+                content_size = spool.tell()
+                stats['hashed'] += 1
+
+                entry = {'sha256': sha256, 'size': content_size, 'mtime_ns': mtime_ns}
+                if rel_path.startswith('data/') and rel_path.endswith('.json') and content_size < 1024 * 1024:
+                    spool.seek(0)
+                    timestamp = record_timestamp(spool.read())
+                    if timestamp:
+                        entry['record_time'] = timestamp
+                        if not previous_entry or previous_entry.get('record_time') != timestamp:
+                            stats['records_changed'] += 1
+
+                if sha256 in known_objects:
+                    entry['snapshot'] = known_objects[sha256]
+                else:
+                    entry['snapshot'] = snapshot_id
+                    if sha256 not in stored_objects:
+                        spool.seek(0)
+                        info = tarfile.TarInfo(f"objects/{sha256}")
+                        info.size = content_size
+                        info.mtime = mtime_ns // 1_000_000_000
+                        tar.addfile(info, spool)
+                        stored_objects.add(sha256)
+                        stats['stored'] += 1
+                        stats['stored_bytes'] += content_size
+                files[rel_path] = entry
+
+        # 第一遍记录全部文件，之后只重扫快照期间发生变化的文件，直到目录状态稳定
+        pending = scan_sources(root)
+        stats['scanned'] = len(pending)
+        for _ in range(MAX_SCAN_PASSES):
+            for rel_path, (size, mtime_ns) in pending.items():
+                capture(rel_path, size, mtime_ns)
+            current = scan_sources(root)
+            for rel_path in set(files) - set(current):
+                del files[rel_path]
+            pending = {rel_path: state for rel_path, state in current.items()
+                       if rel_path not in files or files[rel_path]['mtime_ns'] != state[1]
+                       or files[rel_path]['size'] != state[0]}
+            if not pending:
+                break
+        else:
+            print(f'警告: 快照期间仍有 {len(pending)} 个文件在变化，已使用最后读取到的完整版本')
+
+        manifest = {
+            'snapshot_id': snapshot_id,
+            'parent': parent['snapshot_id'] if parent else None,
+            'created_at': datetime.now().isoformat(),
+            'files': dict(sorted(files.items())),
+            'stats': stats
+        }
+        manifest_data = json.dumps(manifest, ensure_ascii=False, indent=2).encode('utf-8')
+        info = tarfile.TarInfo('manifest.json')
+        info.size = len(manifest_data)
+        info.mtime = int(datetime.now().timestamp())
+        tar.addfile(info, io.BytesIO(manifest_data))
+
+    # 归档写完后再生成清单文件，清单存在即表示快照完整；清单同样先写临时文件再原子替换
+    os.replace(temp_archive_path, archive_path)
+    manifest_path = os.path.join(backup_folder, f"{snapshot_id}.json")
+    temp_manifest_path = f"{manifest_path}.tmp"
+    with open(temp_manifest_path, 'wb') as f:
+        f.write(manifest_data)
+    os.replace(temp_manifest_path, manifest_path)
+    return manifest
+
+def verify_snapshot(snapshot_id, backup_folder=BACKUP_FOLDER, extract_to=None):
+    """校验快照依赖的所有归档内容，返回错误信息列表
+
+    提供 extract_to 时同时把文件恢复到该目录
+    """
+    manifest = load_manifest(backup_folder, snapshot_id)
+    # 按内容所在快照分组，每个归档只打开一次
+    objects_by_snapshot = {}
+    for rel_path, entry in manifest['files'].items():
+        objects_by_snapshot.setdefault(entry['snapshot'], {}).setdefault(entry['sha256'], []).append(rel_path)
+
+    errors = []
+    for source_snapshot, objects in sorted(objects_by_snapshot.items()):
+        archive_path = os.path.join(backup_folder, f"{source_snapshot}.tar.gz")
+        if not os.path.exists(archive_path):
+            errors.append(f'缺少归档: {archive_path}')
+            continue
+        missing = dict(objects)
+        try:
+            # 流式模式按归档内的顺序读取，避免.tar.gz回退查找导致从头重新解压
+            with tarfile.open(archive_path, 'r|gz') as tar:
+                for member in tar:
+                    if not member.isfile() or not member.name.startswith('objects/'):
+                        continue
+                    sha256 = member.name[len('objects/'):]
+                    rel_paths = missing.pop(sha256, None)
+                    if rel_paths is None:
+                        continue
+                    with tar.extractfile(member) as source, tempfile.SpooledTemporaryFile(max_size=16 * 1024 * 1024) as spool:
+                        shutil.copyfileobj(source, spool)
+                        spool.seek(0)
+                        if sha256_file(spool) != sha256:
+                            errors.append(f'内容校验失败: {rel_paths[0]}')
+                            continue
+                        if extract_to is None:
+                            continue
+                        for rel_path in rel_paths:
+                            target_path = os.path.join(extract_to, *rel_path.split('/'))
+                            os.makedirs(os.path.dirname(target_path), exist_ok=True)
+                            spool.seek(0)
+                            with open(target_path, 'wb') as f:
+                                shutil.copyfileobj(spool, f)
+            for rel_paths in missing.values():
+                errors.append(f'归档 {source_snapshot} 中缺少内容: {rel_paths[0]}')
+        except (tarfile.TarError, OSError, EOFError, zlib.error) as e:
+            errors.append(f'归档 {source_snapshot} 读取失败: {e}')
+    return errors
+
+def restore_snapshot(snapshot_id, target, backup_folder=BACKUP_FOLDER, force=False):
+    """校验并恢复快照到目标目录，返回错误信息列表
+
+    先恢复到临时目录并逐个校验SHA256，全部通过后才移动到目标目录
+    """
+    if os.path.isdir(target) and os.listdir(target) and not force:
+        return [f'目标目录非空: {target}（使用 --force 覆盖）']
+
+    os.makedirs(target, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix='.restore-', dir=target)
+    try:
+        errors = verify_snapshot(snapshot_id, backup_folder, extract_to=staging)
+        if errors:
+            return errors
+        for folder in BACKUP_SOURCES:
+            staged_folder = os.path.join(staging, folder)
+            target_folder = os.path.join(target, folder)
+            if os.path.isdir(target_folder):
+                shutil.rmtree(target_folder)
+            if os.path.isdir(staged_folder):
+                os.replace(staged_folder, target_folder)
+            else:
+                os.makedirs(target_folder)
+        return []
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='二维码系统在线增量备份与恢复')
+    parser.add_argument('--root', default='.', help='项目目录（默认当前目录）')
+    parser.add_argument('--backup-dir', default=None, help=f'备份目录（默认 项目目录/{BACKUP_FOLDER}）')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    snapshot_parser = subparsers.add_parser('snapshot', help='生成快照')
+    snapshot_parser.add_argument('--full', action='store_true', help='生成全量快照')
+    subparsers.add_parser('list', help='列出快照')
+    verify_parser = subparsers.add_parser('verify', help='校验快照')
+    verify_parser.add_argument('snapshot_id', nargs='?', help='快照ID（默认最新）')
+    restore_parser = subparsers.add_parser('restore', help='恢复快照')
+    restore_parser.add_argument('snapshot_id', help='快照ID')
+    restore_parser.add_argument('target', help='恢复到的目录')
+    restore_parser.add_argument('--force', action='store_true', help='覆盖目标目录中已有的数据目录')
+
+    args = parser.parse_args(argv)
+    backup_folder = args.backup_dir or os.path.join(args.root, BACKUP_FOLDER)
+
+    if args.command == 'snapshot':
+        manifest = create_snapshot(args.root, backup_folder, full=args.full)
+        stats = manifest['stats']
+        print(f"快照 {manifest['snapshot_id']} 完成（上一快照: {manifest['parent'] or '无'}）")
+        print(f"  文件总数: {len(manifest['files'])}，重新读取: {stats['hashed']}，"
+              f"新归档: {stats['stored']}（{stats['stored_bytes']} 字节），记录新增/更新: {stats['records_changed']}")
+        return 0
+
+    snapshots = list_snapshots(backup_folder)
+    if args.command == 'list':
+        for snapshot_id in snapshots:
+            manifest = load_manifest(backup_folder, snapshot_id)
+            print(f"{snapshot_id}  文件: {len(manifest['files'])}  新归档: {manifest['stats']['stored']}"
+                  f"  上一快照: {manifest['parent'] or '无'}")
+        return 0
+
+    snapshot_id = args.snapshot_id or (snapshots[-1] if snapshots else None)
+    if snapshot_id not in snapshots:
+        print(f'快照不存在: {snapshot_id}')
+        return 1
+
+    if args.command == 'verify':
+        errors = verify_snapshot(snapshot_id, backup_folder)
+    else:
+        errors = restore_snapshot(snapshot_id, args.target, backup_folder, force=args.force)
+
+    for error in errors:
+        print(error)
+    if errors:
+        print(f'快照 {snapshot_id} {"校验" if args.command == "verify" else "恢复"}失败')
+        return 1
+    print(f'快照 {snapshot_id} {"校验通过" if args.command == "verify" else "已恢复到 " + args.target}')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,314 @@
+# -*- coding: utf-8 -*-
+"""
+批量二维码矩阵编码器
+与 qrcode 库的输出逐位一致，但把每个二维码都要重复的计算提前做成表：
+Reed-Solomon生成多项式及其乘法表、各版本的功能图形模板、数据模块排列顺序、
+8种掩码以及格式/版本信息；掩码评分使用NumPy数组运算，同一版本的多个二维码一次批量编码
+依赖 qrcode 库的内部实现（create_data 的填充规则、setup_* 功能图形），requirements.txt 固定了已比对的版本，
+升级前先运行 tests/test_qr_encoder.py 逐位比对
+"""
+
+from functools import lru_cache
+
+import numpy as np
+import qrcode
+from qrcode import util, base
+from PIL import Image
+
+# 每批最多同时评分的二维码数量，限制 (数量, 8, n, n) 掩码数组的内存占用
+BATCH_CHUNK_SIZE = 256
+
+# 1:1:3:1:1 定位图形样式（前后各带4个浅色模块），与 qrcode 的 _lost_point_level3 一致
+FINDER_LIKE_PATTERNS = [
+    np.array([1, 0, 1, 1, 1, 0, 1, 0, 0, 0, 0], dtype=bool),
+    np.array([0, 0, 0, 0, 1, 0, 1, 1, 1, 0, 1], dtype=bool),
+]
+
+def build_gf_tables():
+    """构建GF(256)指数表和对数表（本原多项式 0x11d）"""
+    exp_table = [0] * 256
+    log_table = [0] * 256
+    value = 1
+    for i in range(255):
+        exp_table[i] = value
+        log_table[value] = i
+        value <<= 1
+        if value & 0x100:
+            value ^= 0x11d
+    exp_table[255] = exp_table[0]
+    return exp_table, log_table
+
+GF_EXP, GF_LOG = build_gf_tables()
+
+def gf_multiply(a, b):
+    """GF(256)乘法"""
+    if a == 0 or b == 0:
+        return 0
+    return GF_EXP[(GF_LOG[a] + GF_LOG[b]) % 255]
+
+@lru_cache(maxsize=None)
+def rs_multiply_table(ec_count):
+    """纠错码字数为ec_count时的生成多项式乘法表
+
+    返回 (256, ec_count) 数组：第f行为生成多项式各项系数（不含首项）乘以f
+    """
+    generator = [1]
+    for i in range(ec_count):
+        # generator *= (x + α^i)
+        next_generator = generator + [0]
+        for j, coefficient in enumerate(generator):
+            next_generator[j + 1] ^= gf_multiply(coefficient, GF_EXP[i])
+        generator = next_generator
+
+    table = np.zeros((256, ec_count), dtype=np.uint8)
+    for factor in range(256):
+        table[factor] = [gf_multiply(factor, coefficient) for coefficient in generator[1:]]
+    return table
+
+def rs_remainder(messages, ec_count):
+    """批量计算Reed-Solomon纠错码字
+
+    messages 为 (数量, 数据码字数) 的uint8数组；较短的块可在左侧补0，不影响余式
+    """
+    table = rs_multiply_table(ec_count)
+    remainder = np.zeros((messages.shape[0], ec_count), dtype=np.uint8)
+    for i in range(messages.shape[1]):
+        factor = messages[:, i] ^ remainder[:, 0]
+        remainder[:, :-1] = remainder[:, 1:]
+        remainder[:, -1] = 0
+        remainder ^= table[factor]
+    return remainder
+
+@lru_cache(maxsize=None)
+def codeword_layout(version, error_correction):
+    """纠错块划分及交织顺序
+
+    返回 (块列表[(数据起点, 数据码字数)], 纠错码字数, 交织排列)，
+    交织排列作用于 [全部数据码字, 按块排列的全部纠错码字] 拼接后的数组
+    """
+    rs_blocks = base.rs_blocks(version, error_correction)
+    ec_count = rs_blocks[0].total_count - rs_blocks[0].data_count
+
+    blocks = []
+    offset = 0
+    for rs_block in rs_blocks:
+        blocks.append((offset, rs_block.data_count))
+        offset += rs_block.data_count
+    data_total = offset
+
+    order = []
+    for i in range(max(count for _, count in blocks)):
+        for start, count in blocks:
+            if i < count:
+                order.append(start + i)
+    for i in range(ec_count):
+        for block_index in range(len(blocks)):
+            order.append(data_total + block_index * ec_count + i)
+
+    return blocks, ec_count, np.array(order, dtype=np.intp)
+
+@lru_cache(maxsize=None)
+def version_tables(version):
+    """版本相关的预计算表
+
+    返回 (数据区域掩码, 评分用功能图形, 数据模块行坐标, 数据模块列坐标, 8种掩码)。
+    功能图形直接由 qrcode 自身的绘制方法生成，评分用图形与 qrcode 选择掩码时一致：
+    格式信息和版本信息区域均为浅色
+    """
+    qr = qrcode.QRCode(version=version)
+    size = version * 4 + 17
+    qr.modules_count = size
+    qr.modules = [[None] * size for _ in range(size)]
+    qr.setup_position_probe_pattern(0, 0)
+    qr.setup_position_probe_pattern(size - 7, 0)
+    qr.setup_position_probe_pattern(0, size - 7)
+    qr.setup_position_adjust_pattern()
+    qr.setup_timing_pattern()
+    qr.setup_type_info(True, 0)
+    if version >= 7:
+        qr.setup_type_number(True)
+
+    is_data = np.array([[module is None for module in row] for row in qr.modules])
+    function_modules = np.array([[bool(module) for module in row] for row in qr.modules])
+
+    # 与 QRCode.map_data 相同的之字形遍历顺序
+    rows, cols = [], []
+    direction = -1
+    row = size - 1
+    for col in range(size - 1, 0, -2):
+        if col <= 6:
+            col -= 1
+        while True:
+            for c in (col, col - 1):
+                if is_data[row, c]:
+                    rows.append(row)
+                    cols.append(c)
+            row += direction
+            if row < 0 or size <= row:
+                row -= direction
+                direction = -direction
+                break
+
+    i, j = np.indices((size, size))
+    masks = np.array([
+        (i + j) % 2 == 0,
+        i % 2 == 0,
+        j % 3 == 0,
+        (i + j) % 3 == 0,
+        (i // 2 + j // 3) % 2 == 0,
+        (i * j) % 2 + (i * j) % 3 == 0,
+        ((i * j) % 2 + (i * j) % 3) % 2 == 0,
+        ((i * j) % 3 + (i + j) % 2) % 2 == 0,
+    ]) & is_data
+
+    return is_data, function_modules, np.array(rows, dtype=np.intp), np.array(cols, dtype=np.intp), masks
+
+@lru_cache(maxsize=None)
+def final_function_modules(version, error_correction):
+    """各掩码对应的最终功能图形（含格式信息、版本信息和固定暗模块），形状 (8, n, n)"""
+    size = version * 4 + 17
+    _, function_modules, _, _, _ = version_tables(version)
+    patterns = []
+    for mask_pattern in range(8):
+        qr = qrcode.QRCode(version=version, error_correction=error_correction)
+        qr.modules_count = size
+        qr.modules = function_modules.tolist()
+        qr.setup_type_info(False, mask_pattern)
+        if version >= 7:
+            qr.setup_type_number(False)
+        patterns.append(qr.modules)
+    return np.array(patterns, dtype=bool)
+
+def data_codewords(version, error_correction, data_list):
+    """生成填充后的数据码字，与 util.create_data 中纠错之前的部分一致"""
+    buffer = util.BitBuffer()
+    for data in data_list:
+        buffer.put(data.mode, 4)
+        buffer.put(len(data), util.length_in_bits(data.mode, version))
+        data.write(buffer)
+
+    blocks, _, _ = codeword_layout(version, error_correction)
+    bit_limit = sum(count for _, count in blocks) * 8
+    if len(buffer) > bit_limit:
+        raise qrcode.exceptions.DataOverflowError(
+            "Code length overflow. Data size (%s) > size available (%s)"
+            % (len(buffer), bit_limit)
+        )
+
+    for _ in range(min(bit_limit - len(buffer), 4)):
+        buffer.put_bit(False)
+    if len(buffer) % 8:
+        for _ in range(8 - len(buffer) % 8):
+            buffer.put_bit(False)
+
+    codewords = list(buffer.buffer)
+    for i in range(bit_limit // 8 - len(codewords)):
+        codewords.append(util.PAD0 if i % 2 == 0 else util.PAD1)
+    return codewords
+
+def penalty_scores(candidates):
+    """批量计算掩码评分，与 util.lost_point 结果一致
+
+    candidates 形状为 (..., n, n)，返回形状为 (...) 的评分
+    """
+    size = candidates.shape[-1]
+    score = np.zeros(candidates.shape[:-2], dtype=np.int64)
+
+    for matrix in (candidates, np.swapaxes(candidates, -1, -2)):
+        # 规则1：长度L>=5的同色连续模块计L-2分，即每个长5窗口计1分，每段起点再加2分
+        same = matrix[..., 1:] == matrix[..., :-1]
+        run5 = same[..., :-3] & same[..., 1:-2] & same[..., 2:-1] & same[..., 3:]
+        run_start = np.concatenate([np.ones(run5.shape[:-1] + (1,), dtype=bool), ~same[..., :size - 5]], axis=-1)
+        score += run5.sum(axis=(-1, -2)) + 2 * (run5 & run_start).sum(axis=(-1, -2))
+
+        # 规则3：1:1:3:1:1 图形，每处计40分
+        window_count = size - 10
+        for pattern in FINDER_LIKE_PATTERNS:
+            found = np.ones(matrix.shape[:-1] + (window_count,), dtype=bool)
+            for k, dark in enumerate(pattern):
+                window = matrix[..., k:k + window_count]
+                found &= window if dark else ~window
+            score += 40 * found.sum(axis=(-1, -2))
+
+    # 规则2：2x2同色块，每块计3分
+    top_left = candidates[..., :-1, :-1]
+    block = (top_left == candidates[..., 1:, :-1]) & (top_left == candidates[..., :-1, 1:]) & (top_left == candidates[..., 1:, 1:])
+    score += 3 * block.sum(axis=(-1, -2))
+
+    # 规则4：暗模块比例每偏离50% 5%计10分
+    percent = candidates.sum(axis=(-1, -2)) / float(size ** 2)
+    score += (np.abs(percent * 100 - 50) / 5).astype(np.int64) * 10
+    return score
+
+def encode_version_batch(version, error_correction, codeword_lists):
+    """对同一版本的多个二维码批量完成纠错、排列、掩码选择，返回 (数量, n, n) 布尔矩阵"""
+    blocks, ec_count, order = codeword_layout(version, error_correction)
+    is_data, function_modules, rows, cols, masks = version_tables(version)
+    final_patterns = final_function_modules(version, error_correction)
+    count = len(codeword_lists)
+    size = is_data.shape[0]
+
+    # 所有块一起计算纠错码字，较短的块左侧补0
+    data = np.array(codeword_lists, dtype=np.uint8)
+    max_block = max(block_count for _, block_count in blocks)
+    messages = np.zeros((count, len(blocks), max_block), dtype=np.uint8)
+    for block_index, (start, block_count) in enumerate(blocks):
+        messages[:, block_index, max_block - block_count:] = data[:, start:start + block_count]
+    ec = rs_remainder(messages.reshape(-1, max_block), ec_count).reshape(count, -1)
+    codewords = np.concatenate([data, ec], axis=1)[:, order]
+
+    # 剩余位（数据模块多于码字位数的部分）为0
+    bits = np.unpackbits(codewords, axis=1)
+    modules = np.zeros((count, size, size), dtype=bool)
+    modules[:, rows, cols] = bits[:, :len(rows)] if bits.shape[1] >= len(rows) else \
+        np.pad(bits, ((0, 0), (0, len(rows) - bits.shape[1])))
+
+    # 8种掩码一起评分，取第一个最低分
+    candidates = np.where(is_data, modules[:, None] ^ masks, function_modules)
+    mask_patterns = np.argmin(penalty_scores(candidates), axis=1)
+    return np.where(is_data, modules ^ masks[mask_patterns], final_patterns[mask_patterns])
+
+def prepare_data(data, error_correction):
+    """按 QRCode.add_data 的方式分段并确定最小版本，返回 (版本, 分段列表)
+
+    data 可以是字符串/字节，或已分好的 QRData 分段列表
+    """
+    qr = qrcode.QRCode(version=None, error_correction=error_correction)
+    if isinstance(data, (list, tuple)):
+        for segment in data:
+            qr.add_data(segment)
+    else:
+        qr.add_data(data)
+    return qr.best_fit(), qr.data_list
+
+def encode_batch(payloads, error_correction=qrcode.constants.ERROR_CORRECT_L):
+    """批量编码二维码，结果与 qrcode.QRCode(...).make(fit=True) 的 modules 逐位一致
+
+    payloads 中每项为字符串/字节或 QRData 分段列表；按版本分组后批量编码，
+    返回与输入顺序相同的 (n, n) 布尔矩阵列表
+    """
+    return encode_prepared([prepare_data(payload, error_correction) for payload in payloads], error_correction)
+
+def encode_prepared(prepared, error_correction=qrcode.constants.ERROR_CORRECT_L):
+    """批量编码已确定版本的数据，prepared 中每项为 prepare_data 返回的 (版本, 分段列表)
+
+    调用方已经为选择分段方式计算过版本时使用，避免重复执行 best_fit
+    """
+    groups = {}
+    for index, (version, data_list) in enumerate(prepared):
+        groups.setdefault(version, []).append((index, data_codewords(version, error_correction, data_list)))
+
+    results = [None] * len(prepared)
+    for version, items in groups.items():
+        for chunk_start in range(0, len(items), BATCH_CHUNK_SIZE):
+            chunk = items[chunk_start:chunk_start + BATCH_CHUNK_SIZE]
+            matrices = encode_version_batch(version, error_correction, [codewords for _, codewords in chunk])
+            for (index, _), matrix in zip(chunk, matrices):
+                results[index] = matrix
+    return results
+
+def make_image(modules, box_size=10, border=4):
+    """把模块矩阵渲染为黑白PNG图像，像素与 qrcode 默认的 PilImage 一致"""
+    light = np.pad(~modules, border, constant_values=True)
+    pixels = np.repeat(np.repeat(light, box_size, axis=0), box_size, axis=1)
+    return Image.fromarray(pixels)
@@ -0,0 +1,48 @@
+// 离线二维码查看页面的Service Worker
+// 优先从缓存返回查看页面，同时在后台更新缓存；下拉列表配置由页面自行缓存在localStorage
+const CACHE_NAME = 'offline-viewer-v2';
+const CACHED_PATHS = ['offline'];
+
+self.addEventListener('install', event => {
+    event.waitUntil(
+        caches.open(CACHE_NAME)
+            .then(cache => cache.addAll(CACHED_PATHS))
+            .then(() => self.skipWaiting())
+    );
+});
+
+self.addEventListener('activate', event => {
+    // 清理旧版本的缓存
+    event.waitUntil(
+        caches.keys()
+            .then(names => Promise.all(names.filter(name => name !== CACHE_NAME).map(name => caches.delete(name))))
+            .then(() => self.clients.claim())
+    );
+});
+
+self.addEventListener('fetch', event => {
+    const url = new URL(event.request.url);
+    const isCached = CACHED_PATHS.some(path => url.pathname.endsWith('/' + path));
+    if (event.request.method !== 'GET' || !isCached) {
+        return;
+    }
+
+    // 缓存优先（stale-while-revalidate）：扫码时不等待网络，后台更新缓存供下次使用
+    event.respondWith(
+        caches.open(CACHE_NAME).then(cache =>
+            cache.match(event.request, { ignoreSearch: true }).then(cached => {
+                const network = fetch(event.request).then(response => {
+                    if (response.ok) {
+                        cache.put(event.request, response.clone());
+                    }
+                    return response;
+                });
+                if (cached) {
+                    event.waitUntil(network.catch(() => {}));
+                    return cached;
+                }
+                return network;
+            })
+        )
+    );
+});
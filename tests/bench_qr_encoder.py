@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""
+对比 qrcode 库逐个编码与批量编码器的耗时
+
+用法: python -m tests.bench_qr_encoder [--count N]
+"""
+
+import sys
+import time
+import random
+import argparse
+
+import qrcode
+
+from qr_encoder import encode_batch
+from tests.test_qr_encoder import reference_qrcode
+
+def run_benchmark(count):
+    """对比 qrcode 库逐个编码与批量编码的耗时"""
+    payloads = [f"http://localhost:8000/view/{random.Random(i).getrandbits(128):032x}" for i in range(count)]
+
+    start = time.perf_counter()
+    for payload in payloads:
+        reference_qrcode(payload, qrcode.constants.ERROR_CORRECT_L)
+    reference_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    encode_batch(payloads)
+    batch_time = time.perf_counter() - start
+
+    print(f'二维码数量: {count}')
+    print(f'  qrcode库: {reference_time / count * 1000:.3f} ms/个')
+    print(f'  批量编码: {batch_time / count * 1000:.3f} ms/个')
+    print(f'  加速比: {reference_time / batch_time:.1f}x')
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='批量二维码编码器的性能测试')
+    parser.add_argument('--count', type=int, default=500, help='二维码数量')
+    args = parser.parse_args(argv)
+    run_benchmark(args.count)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""
+批量二维码编码器与 qrcode 库的逐位比对测试
+
+运行: python -m pytest tests/test_qr_encoder.py
+"""
+
+import random
+import string
+
+import numpy as np
+import pytest
+import qrcode
+from qrcode import util
+
+from qr_encoder import encode_batch, make_image
+
+ERROR_CORRECTION_LEVELS = [qrcode.constants.ERROR_CORRECT_L, qrcode.constants.ERROR_CORRECT_M,
+                           qrcode.constants.ERROR_CORRECT_Q, qrcode.constants.ERROR_CORRECT_H]
+
+def random_payloads(count, seed=0):
+    """生成覆盖多种编码模式和版本的随机测试数据"""
+    rng = random.Random(seed)
+    payloads = []
+    for i in range(count):
+        kind = i % 6
+        if kind == 0:
+            payloads.append(f"http://localhost:8000/view/{rng.getrandbits(128):032x}")
+        elif kind == 1:
+            payloads.append(''.join(rng.choice(string.digits) for _ in range(rng.randint(1, 400))))
+        elif kind == 2:
+            payloads.append(''.join(rng.choice(string.ascii_uppercase + ' $%*+-./:') for _ in range(rng.randint(1, 300))))
+        elif kind == 3:
+            payloads.append(bytes(rng.getrandbits(8) for _ in range(rng.randint(1, 600))))
+        elif kind == 4:
+            payloads.append('试块' + ''.join(rng.choice(string.ascii_letters + string.digits) for _ in range(rng.randint(1, 80))))
+        else:
+            payloads.append(random_segments(rng))
+    return payloads
+
+def random_segments(rng):
+    """生成与 app.compact_payload_segments 相同结构的 QRData 分段列表（含相邻段合并的情况）"""
+    prefix = 'TB1.' + ''.join(rng.choice(string.ascii_uppercase + string.digits) for _ in range(2))
+    prefix += ''.join(f".{rng.randint(0, 35):X}" for _ in range(3)) + '.'
+    prefix += ''.join(rng.choice(string.ascii_uppercase + string.digits) for _ in range(6)) + '.'
+    if rng.random() < 0.5:
+        specimen = (''.join(rng.choice(string.ascii_uppercase + string.digits + '-') for _ in range(rng.randint(1, 40))), util.MODE_ALPHA_NUM)
+    else:
+        specimen = ('试块-' + ''.join(rng.choice(string.ascii_letters + string.digits) for _ in range(rng.randint(1, 30))), util.MODE_8BIT_BYTE)
+    pieces = [("http://localhost:8000/offline#", util.MODE_8BIT_BYTE), (prefix, util.MODE_ALPHA_NUM), specimen]
+
+    segments = [list(pieces[0])]
+    for piece in pieces[1:]:
+        if rng.random() < 0.5:
+            segments.append(list(piece))
+        else:
+            segments[-1][0] += piece[0]
+            segments[-1][1] = max(segments[-1][1], piece[1])
+    return [util.QRData(text, mode=mode) for text, mode in segments]
+
+def reference_qrcode(payload, error_correction):
+    """用 qrcode 库生成参考结果"""
+    qr = qrcode.QRCode(version=None, error_correction=error_correction, box_size=10, border=4)
+    if isinstance(payload, list):
+        for segment in payload:
+            qr.add_data(segment)
+    else:
+        qr.add_data(payload)
+    qr.make(fit=True)
+    return qr
+
+def run_check(count, levels=ERROR_CORRECTION_LEVELS):
+    """与 qrcode 库逐位比对矩阵和图像，返回不一致的数量"""
+    failures = 0
+    for error_correction in levels:
+        payloads = random_payloads(count, seed=error_correction)
+        matrices = encode_batch(payloads, error_correction)
+        for i, (payload, matrix) in enumerate(zip(payloads, matrices)):
+            qr = reference_qrcode(payload, error_correction)
+            if not np.array_equal(matrix, np.array(qr.modules, dtype=bool)):
+                failures += 1
+                print(f'矩阵不一致: 纠错级别={error_correction} 版本={qr.version} 数据={str(payload)[:40]!r}')
+            elif i % 25 == 0:
+                expected = qr.make_image(fill_color="black", back_color="white").get_image()
+                if make_image(matrix).tobytes() != expected.tobytes():
+                    failures += 1
+                    print(f'图像不一致: 纠错级别={error_correction} 版本={qr.version}')
+    return failures
+
+@pytest.mark.parametrize('error_correction', ERROR_CORRECTION_LEVELS)
+def test_matches_qrcode_library(error_correction):
+    assert run_check(100, [error_correction]) == 0